@@ -0,0 +1,98 @@
+import dataclasses
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import timezone
+
+import requests
+from marshmallow import ValidationError
+
+from immersion_controller.carbon.schemas import IntensityResponseSchema
+
+API_URL = "https://api.carbonintensity.org.uk"
+API_DATETIME_FORMAT = "%Y-%m-%dT%H:%MZ"
+TIMEOUT = 10  # seconds; the feed is optional, so never wait long for it
+
+
+class Schemas(threading.local):
+    def __init__(self):
+        self.intensity_response = IntensityResponseSchema()
+
+
+schemas = Schemas()
+
+
+class CarbonIntensityException(Exception):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class CarbonIntensity:
+    value: ...  # gCO2 per kWh
+    valid_from: ...
+    valid_to: ...
+
+    @classmethod
+    def from_api(cls, period):
+        intensity = period["intensity"]
+        value = intensity.get("actual")
+        if value is None:
+            value = intensity.get("forecast")
+        return cls(value=value, valid_from=period["from_"], valid_to=period["to"])
+
+
+def intensities_from_response(decoded_response):
+    intensities = [
+        CarbonIntensity.from_api(period) for period in decoded_response["data"]
+    ]
+    return sorted(
+        (intensity for intensity in intensities if intensity.value is not None),
+        key=lambda intensity: intensity.valid_from,
+    )
+
+
+class CarbonIntensitySource:
+    def get_intensities(self, period_from, period_to):
+        raise NotImplementedError()
+
+
+class CarbonIntensityFile(CarbonIntensitySource):
+    """Intensities read once from a file in the format the API returns."""
+
+    def __init__(self, path):
+        with open(path) as f:
+            decoded = schemas.intensity_response.loads(f.read())
+        self.intensities = intensities_from_response(decoded)
+        self.valid_froms = [intensity.valid_from for intensity in self.intensities]
+
+    def get_intensities(self, period_from, period_to):
+        start = max(0, bisect_right(self.valid_froms, period_from) - 1)
+        if start < len(self.intensities) and (
+            self.intensities[start].valid_to <= period_from
+        ):
+            start += 1
+        stop = bisect_left(self.valid_froms, period_to)
+        return self.intensities[start:stop]
+
+
+class CarbonIntensityAPI(CarbonIntensitySource):
+    """Forecasts from the national carbon intensity API, or a local stand-in."""
+
+    def __init__(self, url=API_URL, timeout=TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def get_intensities(self, period_from, period_to):
+        period_from = period_from.astimezone(timezone.utc)
+        period_to = period_to.astimezone(timezone.utc)
+        url = (
+            f"{self.url}/intensity/{period_from.strftime(API_DATETIME_FORMAT)}/"
+            f"{period_to.strftime(API_DATETIME_FORMAT)}"
+        )
+        try:
+            response = requests.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            decoded_response = schemas.intensity_response.loads(response.content)
+        except (requests.RequestException, ValueError, ValidationError) as error:
+            raise CarbonIntensityException(error) from error
+
+        return intensities_from_response(decoded_response)
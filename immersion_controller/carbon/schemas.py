@@ -0,0 +1,26 @@
+from marshmallow import EXCLUDE, Schema, fields
+
+
+class IntensitySchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    forecast = fields.Integer(allow_none=True)
+    actual = fields.Integer(allow_none=True)
+    index = fields.String(allow_none=True)
+
+
+class IntensityPeriodSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    from_ = fields.AwareDateTime(data_key="from", required=True)
+    to = fields.AwareDateTime(required=True)
+    intensity = fields.Nested(IntensitySchema, required=True)
+
+
+class IntensityResponseSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    data = fields.List(fields.Nested(IntensityPeriodSchema), required=True)
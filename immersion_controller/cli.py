@@ -1,30 +1,21 @@
-import logging.config
+import cProfile
+import logging
+import pstats
+from datetime import datetime, timedelta, timezone
 
 import click
+from marshmallow import ValidationError
 
-from immersion_controller.control import Controller
-from immersion_controller.octopus.account import Agreement
-from immersion_controller.switches import ShellyProEM
-
-logging.config.dictConfig(
-    {
-        "version": 1,
-        "disable_existing_loggers": False,
-        "formatters": {
-            "standard": {"format": "%(asctime)s [%(levelname)s] %(name)s: %(message)s"},
-        },
-        "handlers": {
-            "console": {
-                "class": "logging.StreamHandler",
-                "formatter": "standard",
-            },
-        },
-        "root": {
-            "handlers": ["console"],
-            "level": "INFO",
-        },
-    }
+from immersion_controller.carbon.intensity import (
+    CarbonIntensityAPI,
+    CarbonIntensityFile,
 )
+from immersion_controller.control import Controller, SimulatedClock
+from immersion_controller.cost import CostModel
+from immersion_controller.log import configure_logging
+from immersion_controller.octopus.account import API_URL, Agreement
+from immersion_controller.switches import DryRunSwitch, ShellyProEM
+from immersion_controller.tracing import LoggingTracer, Tracer
 
 logger = logging.getLogger(__name__)
 
@@ -41,15 +32,210 @@ logger = logging.getLogger(__name__)
 )
 @click.option(
     "--shelly-url",
-    required=True,
-    help="URL of your Shelly device",
+    default=None,
+    help="URL of your Shelly device, required unless profiling",
     envvar="IC_SHELLY_URL",
 )
-def main(api_key, account_number, shelly_url):
-    electricity_agreement = Agreement.get_electricity_agreement(api_key, account_number)
-    logger.info(electricity_agreement)
-    gas_agreement = Agreement.get_gas_agreement(api_key, account_number)
-    logger.info(gas_agreement)
+@click.option(
+    "--octopus-api-url",
+    default=API_URL,
+    show_default=True,
+    help="Base URL of the Octopus Energy API, e.g. to use a local emulator",
+    envvar="IC_OCTOPUS_API_URL",
+)
+@click.option(
+    "--gas-efficiency",
+    type=click.FloatRange(0, 1, min_open=True),
+    default=1.0,
+    show_default=True,
+    help="Fraction of the gas bought that your boiler turns into hot water",
+    envvar="IC_GAS_EFFICIENCY",
+)
+@click.option(
+    "--exclude-vat/--include-vat",
+    default=False,
+    help="Compare prices excluding VAT",
+    envvar="IC_EXCLUDE_VAT",
+)
+@click.option(
+    "--carbon-price",
+    type=click.FloatRange(min=0),
+    default=0.0,
+    show_default=True,
+    help="Pence per kgCO2 to add to the cost of each fuel",
+    envvar="IC_CARBON_PRICE",
+)
+@click.option(
+    "--electricity-carbon-intensity",
+    type=click.FloatRange(min=0),
+    default=200.0,
+    show_default=True,
+    help="gCO2 per kWh of electricity, used with --carbon-price",
+    envvar="IC_ELECTRICITY_CARBON_INTENSITY",
+)
+@click.option(
+    "--gas-carbon-intensity",
+    type=click.FloatRange(min=0),
+    default=183.0,
+    show_default=True,
+    help="gCO2 per kWh of gas, used with --carbon-price",
+    envvar="IC_GAS_CARBON_INTENSITY",
+)
+@click.option(
+    "--carbon-intensity-url",
+    default=None,
+    help=(
+        "Carbon intensity API to read electricity carbon intensity forecasts from, "
+        "e.g. https://api.carbonintensity.org.uk"
+    ),
+    envvar="IC_CARBON_INTENSITY_URL",
+)
+@click.option(
+    "--carbon-intensity-file",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="File of electricity carbon intensities, in the carbon intensity API format",
+    envvar="IC_CARBON_INTENSITY_FILE",
+)
+@click.option(
+    "--trace/--no-trace",
+    default=False,
+    help="Log the duration of each stage of every period",
+    envvar="IC_TRACE",
+)
+@click.option(
+    "--profile",
+    type=click.IntRange(min=1),
+    default=None,
+    help=(
+        "Profile this many past periods with a simulated clock and a dry run "
+        "switch, print the cProfile statistics, then exit"
+    ),
+)
+@click.option(
+    "--log-level",
+    type=click.Choice(
+        ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"], case_sensitive=False
+    ),
+    default="INFO",
+    show_default=True,
+    help="Minimum level of log messages to output",
+    envvar="IC_LOG_LEVEL",
+)
+@click.option(
+    "--log-format",
+    type=click.Choice(["text", "json"], case_sensitive=False),
+    default="text",
+    show_default=True,
+    help="Output log messages as plain text or one JSON object per line",
+    envvar="IC_LOG_FORMAT",
+)
+def main(
+    api_key,
+    account_number,
+    shelly_url,
+    octopus_api_url,
+    gas_efficiency,
+    exclude_vat,
+    carbon_price,
+    electricity_carbon_intensity,
+    gas_carbon_intensity,
+    carbon_intensity_url,
+    carbon_intensity_file,
+    trace,
+    profile,
+    log_level,
+    log_format,
+):
+    if shelly_url is None and profile is None:
+        raise click.UsageError("Missing option '--shelly-url'")
+    if carbon_intensity_url is not None and carbon_intensity_file is not None:
+        raise click.UsageError(
+            "Use only one of --carbon-intensity-url and --carbon-intensity-file"
+        )
+    if (
+        carbon_intensity_url is not None or carbon_intensity_file is not None
+    ) and carbon_price == 0:
+        raise click.UsageError(
+            "Carbon intensity forecasts only affect decisions with a --carbon-price"
+        )
+    carbon_intensity_source = None
+    if carbon_intensity_url is not None:
+        carbon_intensity_source = CarbonIntensityAPI(carbon_intensity_url)
+    elif carbon_intensity_file is not None:
+        try:
+            carbon_intensity_source = CarbonIntensityFile(carbon_intensity_file)
+        except (OSError, ValueError, ValidationError) as error:
+            raise click.BadParameter(
+                f"not a readable carbon intensity file: {error}",
+                param_hint="--carbon-intensity-file",
+            ) from error
+
+    listener = configure_logging(log_level.upper(), log_format.lower() == "json")
+    controller_options = {
+        "carbon_intensity_source": carbon_intensity_source,
+        "tracer": LoggingTracer() if trace else Tracer(),
+        "electricity_cost": CostModel(
+            include_vat=not exclude_vat,
+            carbon_intensity=electricity_carbon_intensity,
+            carbon_price=carbon_price,
+        ),
+        "gas_cost": CostModel(
+            efficiency=gas_efficiency,
+            include_vat=not exclude_vat,
+            carbon_intensity=gas_carbon_intensity,
+            carbon_price=carbon_price,
+        ),
+    }
+    try:
+        run(
+            api_key,
+            account_number,
+            shelly_url,
+            octopus_api_url,
+            profile,
+            **controller_options,
+        )
+    finally:
+        listener.stop()
+
+
+def run(
+    api_key, account_number, shelly_url, octopus_api_url, profile, **controller_options
+):
+    electricity_agreement = Agreement.get_electricity_agreement(
+        api_key, account_number, api_url=octopus_api_url
+    )
+    logger.info("%s", electricity_agreement)
+    gas_agreement = Agreement.get_gas_agreement(
+        api_key, account_number, api_url=octopus_api_url
+    )
+    logger.info("%s", gas_agreement)
+
+    if profile is not None:
+        run_profile(electricity_agreement, gas_agreement, profile, **controller_options)
+        return
+
     shelly_switch = ShellyProEM(shelly_url)
-    controller = Controller(electricity_agreement, gas_agreement, shelly_switch)
+    controller = Controller(
+        electricity_agreement, gas_agreement, shelly_switch, **controller_options
+    )
     controller.run()
+
+
+def run_profile(electricity_agreement, gas_agreement, periods, **controller_options):
+    # Start far enough in the past that every simulated period has published rates.
+    clock = SimulatedClock(
+        datetime.now(tz=timezone.utc) - periods * timedelta(minutes=30)
+    )
+    controller = Controller(
+        electricity_agreement,
+        gas_agreement,
+        DryRunSwitch(),
+        sleep_until=clock.sleep_until,
+        now=clock.now,
+        **controller_options,
+    )
+    profiler = cProfile.Profile()
+    profiler.runcall(controller.run, periods)
+    pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(30)
@@ -1,7 +1,13 @@
 import logging
+import threading
 import time
 from datetime import datetime, timezone
 
+from immersion_controller.carbon.intensity import CarbonIntensityException
+from immersion_controller.cost import CostModel, plan
+from immersion_controller.timeseries import align
+from immersion_controller.tracing import Tracer
+
 logger = logging.getLogger(__name__)
 
 
@@ -12,20 +18,81 @@ class ControllerException(Exception):
 def sleep_until(dt):
     now = datetime.now(tz=timezone.utc)
     duration = dt - now
-    logger.info(f"sleeping until {dt}")
+    logger.info("sleeping until %s", dt)
     time.sleep(duration.total_seconds())
 
 
+def utcnow():
+    return datetime.now(tz=timezone.utc)
+
+
+class SimulatedClock:
+    """A clock that jumps straight to the time it is asked to sleep until."""
+
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def sleep_until(self, dt):
+        self.current = max(self.current, dt)
+
+
 class Controller:
     def __init__(
-        self, electricity_agreement, gas_agreement, switch, sleep_until=sleep_until
+        self,
+        electricity_agreement,
+        gas_agreement,
+        switch,
+        sleep_until=sleep_until,
+        now=utcnow,
+        tracer=None,
+        electricity_cost=None,
+        gas_cost=None,
+        carbon_intensity_source=None,
     ):
         self.electricity_agreement = electricity_agreement
         self.gas_agreement = gas_agreement
         self.switch = switch
         self.sleep_until = sleep_until
+        self.now = now
+        self.tracer = tracer if tracer is not None else Tracer()
+        self.electricity_cost = (
+            electricity_cost if electricity_cost is not None else CostModel()
+        )
+        self.gas_cost = gas_cost if gas_cost is not None else CostModel()
+        self.carbon_intensity_source = carbon_intensity_source
+        self.running = threading.Lock()
 
     def run(self, periods=None):
+        # Agreements and switches may be shared between controllers in different
+        # threads, but a single controller only drives its switch from one thread.
+        if not self.running.acquire(blocking=False):
+            raise ControllerException("controller is already running")
+        try:
+            self.run_periods(periods)
+        finally:
+            self.running.release()
+
+    def get_carbon_intensity(self, electricity_rate):
+        # Carbon intensity is optional, so fall back to the cost model's constant
+        # intensity rather than stopping if it's unavailable.
+        try:
+            intensities = self.carbon_intensity_source.get_intensities(
+                electricity_rate.valid_from, electricity_rate.valid_to
+            )
+        except CarbonIntensityException as exception:
+            logger.warning("carbon intensity unavailable: %s", exception)
+            return None
+        (carbon_intensity,) = align(
+            [electricity_rate],
+            intensities,
+            default=self.electricity_cost.carbon_intensity,
+        )
+        return carbon_intensity
+
+    def run_periods(self, periods):
         def loop(periods):
             if periods is not None:
                 yield from range(periods)
@@ -35,19 +102,39 @@ class Controller:
                     count += 1
                     yield count
 
-        for _ in loop(periods):
-            now = datetime.now(tz=timezone.utc)
-            electricity_rate = self.electricity_agreement.get_rate(now)
-            gas_rate = self.gas_agreement.get_rate(now)
+        for period in loop(periods):
+            now = self.now()
+            with self.tracer.span("fetch_electricity", period=period):
+                electricity_rate = self.electricity_agreement.get_rate(now)
+            with self.tracer.span("fetch_gas", period=period):
+                gas_rate = self.gas_agreement.get_rate(now)
+
+            carbon_intensity = None
+            if self.carbon_intensity_source is not None:
+                with self.tracer.span("fetch_carbon_intensity", period=period):
+                    carbon_intensity = self.get_carbon_intensity(electricity_rate)
 
-            turn_on = electricity_rate.value <= gas_rate.value
+            with self.tracer.span("decide", period=period):
+                electricity_cost = self.electricity_cost.cost(
+                    electricity_rate.value, carbon_intensity
+                )
+                gas_cost = self.gas_cost.cost(gas_rate.value)
+                (turn_on,) = plan([electricity_cost], [gas_cost])
 
             logger.info(
-                f"gas rate = {gas_rate.value}, "
-                f"electricity rate = {electricity_rate.value}, "
-                f"turn on = {turn_on}"
+                "gas rate = %s, electricity rate = %s, "
+                "gas cost = %.2f, electricity cost = %.2f, turn on = %s",
+                gas_rate.value,
+                electricity_rate.value,
+                gas_cost,
+                electricity_cost,
+                turn_on,
             )
             if turn_on:
-                self.switch.turn_on(electricity_rate.valid_to)
+                with self.tracer.span("switch", period=period):
+                    self.switch.turn_on(electricity_rate.valid_to)
 
-            self.sleep_until(electricity_rate.valid_to)
+            with self.tracer.span("sleep", period=period) as attributes:
+                self.sleep_until(electricity_rate.valid_to)
+                overshoot = self.now() - electricity_rate.valid_to
+                attributes["overshoot_ms"] = round(overshoot.total_seconds() * 1000, 3)
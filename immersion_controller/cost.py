@@ -0,0 +1,93 @@
+"""Effective cost of a useful kWh of hot water from each fuel.
+
+Prices are unit rates in pence per kWh including VAT, the ``value`` of a
+``UnitRate`` and of an archived rate column. Standing charges are paid whatever
+heats the water, so they never change which fuel is cheaper and are left out.
+"""
+
+import dataclasses
+
+from immersion_controller.timeseries import align
+
+VAT_RATE = 0.05  # domestic energy
+
+
+@dataclasses.dataclass(frozen=True)
+class CostModel:
+    efficiency: ... = 1.0  # useful kWh of heat per kWh bought
+    include_vat: ... = True
+    vat_rate: ... = VAT_RATE
+    carbon_intensity: ... = 0.0  # gCO2 per kWh bought, used without a series
+    carbon_price: ... = 0.0  # pence per kgCO2
+
+    def __post_init__(self):
+        if not 0 < self.efficiency <= 1:
+            raise ValueError(f"Efficiency must be in (0, 1], got {self.efficiency}")
+
+    def costs(self, values, carbon_intensities=None):
+        """Cost per useful kWh for each price in ``values``, in pence. Carbon is
+        weighted by ``carbon_intensities`` aligned with the prices if given,
+        otherwise by the model's constant carbon intensity."""
+        price_factor = 1 / self.efficiency
+        if not self.include_vat:
+            price_factor /= 1 + self.vat_rate
+        carbon_factor = self.carbon_price / 1000 / self.efficiency
+
+        if carbon_intensities is None:
+            offset = carbon_factor * self.carbon_intensity
+            return [value * price_factor + offset for value in values]
+
+        if len(carbon_intensities) != len(values):
+            raise ValueError(
+                f"Got {len(carbon_intensities)} carbon intensities "
+                f"for {len(values)} prices"
+            )
+        return [
+            value * price_factor + intensity * carbon_factor
+            for value, intensity in zip(values, carbon_intensities)
+        ]
+
+    def cost(self, value, carbon_intensity=None):
+        if carbon_intensity is None:
+            return self.costs([value])[0]
+        return self.costs([value], [carbon_intensity])[0]
+
+
+def plan(electricity_costs, gas_costs):
+    """Whether to heat with electricity in each period, given aligned costs."""
+    if len(electricity_costs) != len(gas_costs):
+        raise ValueError(
+            f"Got {len(electricity_costs)} electricity costs "
+            f"and {len(gas_costs)} gas costs"
+        )
+    return [
+        electricity <= gas for electricity, gas in zip(electricity_costs, gas_costs)
+    ]
+
+
+def plan_rates(
+    electricity_rates,
+    gas_rates,
+    electricity_cost,
+    gas_cost,
+    carbon_intensities=None,
+):
+    """Whether to heat with electricity in each of ``electricity_rates``.
+
+    Gas rates and electricity carbon intensities are aligned onto the electricity
+    rates' half hours, then every period is costed in one pass. Periods without a
+    carbon intensity use the cost model's constant one.
+    """
+    electricity_values = [rate.value for rate in electricity_rates]
+    gas_values = align(electricity_rates, gas_rates)
+    electricity_carbon = None
+    if carbon_intensities is not None:
+        electricity_carbon = align(
+            electricity_rates,
+            carbon_intensities,
+            default=electricity_cost.carbon_intensity,
+        )
+    return plan(
+        electricity_cost.costs(electricity_values, electricity_carbon),
+        gas_cost.costs(gas_values),
+    )
@@ -0,0 +1,98 @@
+"""A stand-in for the national carbon intensity API's ``/intensity/{from}/{to}``
+endpoint, serving half-hourly intensities from fixture data."""
+
+import json
+import re
+import threading
+from datetime import timedelta
+
+import click
+
+from immersion_controller.carbon.intensity import API_DATETIME_FORMAT
+from immersion_controller.emulators.octopus import overlaps, parse_datetime
+from immersion_controller.emulators.server import EmulatorServer
+
+INTENSITY_PATH = re.compile(r"^/intensity/(?P<period_from>[^/]+)/(?P<period_to>[^/]+)$")
+MAX_PERIOD = timedelta(days=14)
+
+
+def half_hourly_intensities(start, periods, forecast):
+    """Intensity periods for ``periods`` half hours from ``start``, with
+    ``forecast(i)`` giving the gCO2/kWh forecast of the i-th period."""
+    return [
+        {
+            "from": (start + i * timedelta(minutes=30)).strftime(API_DATETIME_FORMAT),
+            "to": (start + (i + 1) * timedelta(minutes=30)).strftime(
+                API_DATETIME_FORMAT
+            ),
+            "intensity": {"forecast": forecast(i), "actual": None, "index": None},
+        }
+        for i in range(periods)
+    ]
+
+
+class CarbonIntensityEmulator:
+    def __init__(self, data=None):
+        self.lock = threading.Lock()
+        self.data = []
+        self.add_intensities(data or [])
+
+    @classmethod
+    def from_fixture(cls, path):
+        with open(path) as f:
+            return cls(json.load(f)["data"])
+
+    def add_intensities(self, data):
+        rows = [
+            (parse_datetime(period["from"]), parse_datetime(period["to"]), period)
+            for period in data
+        ]
+        with self.lock:
+            self.data = sorted(self.data + rows, key=lambda row: row[0])
+
+    def handle(self, path, query, headers):
+        match = INTENSITY_PATH.match(path)
+        if match is None:
+            return 404, {"error": {"code": "404 Not Found"}}
+        try:
+            period_from = parse_datetime(match["period_from"])
+            period_to = parse_datetime(match["period_to"])
+        except ValueError as error:
+            return 400, {"error": {"code": "400 Bad Request", "message": str(error)}}
+        if period_to - period_from > MAX_PERIOD:
+            return 400, {
+                "error": {
+                    "code": "400 Bad Request",
+                    "message": "Date range must be 14 days or fewer",
+                }
+            }
+
+        with self.lock:
+            rows = self.data
+        return 200, {
+            "data": [
+                period
+                for valid_from, valid_to, period in rows
+                if overlaps(valid_from, valid_to, period_from, period_to)
+            ]
+        }
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8002, show_default=True)
+@click.option(
+    "--fixture",
+    type=click.Path(exists=True, dir_okay=False),
+    required=True,
+    help="JSON file in the format the carbon intensity API returns",
+)
+def main(host, port, fixture):
+    emulator = CarbonIntensityEmulator.from_fixture(fixture)
+    server = EmulatorServer(emulator, host, port)
+    click.echo(f"Carbon intensity API emulator at {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""A stand-in for the parts of the Octopus Energy API the controller uses.
+
+Serves account details, paginated standard unit rates and consumption from fixture
+data, so the controller can be run and load tested against real sockets without
+touching the real API.
+"""
+
+import base64
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+import click
+
+from immersion_controller.emulators.server import EmulatorServer
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1500
+
+ACCOUNT_PATH = re.compile(r"^/v1/accounts/(?P<account_number>[^/]+)/$")
+UNIT_RATES_PATH = re.compile(
+    r"^/v1/products/(?P<product_code>[^/]+)/(?:electricity|gas)-tariffs/"
+    r"(?P<tariff_code>[^/]+)/standard-unit-rates/$"
+)
+CONSUMPTION_PATH = re.compile(
+    r"^/v1/(?P<energy_type>electricity|gas)-meter-points/(?P<meter_point>[^/]+)/"
+    r"meters/(?P<serial_number>[^/]+)/consumption/$"
+)
+
+
+def parse_datetime(value):
+    if value is None:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def half_hourly_unit_rates(start, periods, value):
+    """Unit rates for ``periods`` half hours from ``start``, newest first, with
+    ``value(i)`` giving the price including VAT of the i-th period."""
+    unit_rates = []
+    for i in range(periods):
+        value_inc_vat = value(i)
+        unit_rates.append(
+            {
+                "value_exc_vat": round(value_inc_vat / 1.05, 4),
+                "value_inc_vat": value_inc_vat,
+                "valid_from": (start + i * timedelta(minutes=30)).isoformat(),
+                "valid_to": (start + (i + 1) * timedelta(minutes=30)).isoformat(),
+                "payment_method": None,
+            }
+        )
+    return unit_rates[::-1]
+
+
+def overlaps(valid_from, valid_to, period_from, period_to):
+    return (period_from is None or valid_to is None or valid_to > period_from) and (
+        period_to is None or valid_from < period_to
+    )
+
+
+class OctopusEmulator:
+    def __init__(self, accounts=None, unit_rates=None, consumption=None, api_key=None):
+        """
+        accounts: account number to account detail, as returned by the API
+        unit_rates: tariff code to list of unit rates, as returned by the API
+        consumption: "<energy type>/<MPAN or MPRN>/<serial number>" to list of
+            consumption intervals, as returned by the API
+        api_key: if given, account requests must authenticate with it
+        """
+        self.accounts = dict(accounts or {})
+        self.api_key = api_key
+        self.lock = threading.Lock()
+        self.unit_rates = {}
+        self.consumption = {}
+        for tariff_code, rates in (unit_rates or {}).items():
+            self.add_unit_rates(tariff_code, rates)
+        for key, intervals in (consumption or {}).items():
+            self.add_consumption(key, intervals)
+
+    @classmethod
+    def from_fixture(cls, path, api_key=None):
+        with open(path) as f:
+            fixture = json.load(f)
+        return cls(
+            accounts=fixture.get("accounts"),
+            unit_rates=fixture.get("unit_rates"),
+            consumption=fixture.get("consumption"),
+            api_key=api_key,
+        )
+
+    def add_unit_rates(self, tariff_code, rates):
+        rows = [
+            (parse_datetime(rate["valid_from"]), parse_datetime(rate["valid_to"]), rate)
+            for rate in rates
+        ]
+        with self.lock:
+            rows += self.unit_rates.get(tariff_code, [])
+            self.unit_rates[tariff_code] = sorted(
+                rows, key=lambda row: row[0], reverse=True
+            )
+
+    def add_consumption(self, key, intervals):
+        rows = [
+            (
+                parse_datetime(interval["interval_start"]),
+                parse_datetime(interval["interval_end"]),
+                interval,
+            )
+            for interval in intervals
+        ]
+        with self.lock:
+            rows += self.consumption.get(key, [])
+            self.consumption[key] = sorted(rows, key=lambda row: row[0], reverse=True)
+
+    def handle(self, path, query, headers):
+        if match := ACCOUNT_PATH.match(path):
+            return self.account(match["account_number"], headers)
+        if match := UNIT_RATES_PATH.match(path):
+            with self.lock:
+                rows = self.unit_rates.get(match["tariff_code"])
+            if rows is None:
+                return 404, {"detail": "Not found."}
+            return self.paginate(rows, path, query, headers)
+        if match := CONSUMPTION_PATH.match(path):
+            key = "/".join(
+                [match["energy_type"], match["meter_point"], match["serial_number"]]
+            )
+            with self.lock:
+                rows = self.consumption.get(key)
+            if rows is None:
+                return 404, {"detail": "Not found."}
+            if query.get("order_by") == "period":
+                rows = rows[::-1]
+            return self.paginate(rows, path, query, headers)
+        return 404, {"detail": "Not found."}
+
+    def account(self, account_number, headers):
+        if self.api_key is not None:
+            expected = base64.b64encode(f"{self.api_key}:".encode()).decode()
+            if headers.get("Authorization") != f"Basic {expected}":
+                return 401, {"detail": "Authentication credentials were not provided."}
+        try:
+            return 200, self.accounts[account_number]
+        except KeyError:
+            return 404, {"detail": "Not found."}
+
+    def paginate(self, rows, path, query, headers):
+        try:
+            period_from = parse_datetime(query.get("period_from"))
+            period_to = parse_datetime(query.get("period_to"))
+            page = int(query.get("page", 1))
+            page_size = min(
+                int(query.get("page_size", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE
+            )
+        except ValueError as error:
+            return 400, {"detail": str(error)}
+        if page < 1 or page_size < 1:
+            return 404, {"detail": "Invalid page."}
+
+        results = [
+            result
+            for valid_from, valid_to, result in rows
+            if overlaps(valid_from, valid_to, period_from, period_to)
+        ]
+        start = (page - 1) * page_size
+        end = start + page_size
+        if start and start >= len(results):
+            return 404, {"detail": "Invalid page."}
+
+        def page_url(number):
+            return f"http://{headers['Host']}{path}?" + urlencode(
+                {**query, "page": number}
+            )
+
+        return 200, {
+            "count": len(results),
+            "next": page_url(page + 1) if end < len(results) else None,
+            "previous": page_url(page - 1) if page > 1 else None,
+            "results": results[start:end],
+        }
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8000, show_default=True)
+@click.option(
+    "--fixture",
+    type=click.Path(exists=True, dir_okay=False),
+    required=True,
+    help="JSON file with accounts, unit_rates and consumption",
+)
+@click.option("--api-key", default=None, help="Require this API key for accounts")
+def main(host, port, fixture, api_key):
+    emulator = OctopusEmulator.from_fixture(fixture, api_key=api_key)
+    server = EmulatorServer(emulator, host, port)
+    click.echo(f"Octopus API emulator at {server.url}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
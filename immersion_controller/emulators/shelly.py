@@ -0,0 +1,127 @@
+"""A stand-in for Shelly relays implementing the ``/relay/0`` endpoint.
+
+One server emulates any number of relays: ``/relay/0`` is the default relay and
+``/<name>/relay/0`` is the relay called ``name``, created on first use. Latency
+and failures can be injected to load test controllers.
+"""
+
+import random
+import re
+import threading
+import time
+
+import click
+
+from immersion_controller.emulators.server import EmulatorServer
+
+RELAY_PATH = re.compile(r"^(?:/(?P<name>[^/]+))?/relay/0$")
+DEFAULT_RELAY = ""
+
+
+class Relay:
+    def __init__(self):
+        self.ison = False
+        self.timer_started_at = None
+        self.timer_duration = None
+        self.requests = 0
+
+    def update(self, now):
+        if self.timer_started_at is not None:
+            if now >= self.timer_started_at + self.timer_duration:
+                self.ison = not self.ison  # the timer flips the relay back
+                self.timer_started_at = None
+                self.timer_duration = None
+
+    def turn(self, on, timer, now):
+        self.ison = on
+        if timer:
+            self.timer_started_at = now
+            self.timer_duration = timer
+        else:
+            self.timer_started_at = None
+            self.timer_duration = None
+
+    def status(self, now):
+        has_timer = self.timer_started_at is not None
+        return {
+            "ison": self.ison,
+            "has_timer": has_timer,
+            "timer_started_at": round(self.timer_started_at) if has_timer else 0,
+            "timer_duration": float(self.timer_duration) if has_timer else 0,
+            "timer_remaining": (
+                max(0, self.timer_started_at + self.timer_duration - now)
+                if has_timer
+                else 0
+            ),
+            "overpower": False,
+            "source": "http",
+        }
+
+
+class ShellyEmulator:
+    def __init__(self, latency=0, failure_rate=0, seed=None, clock=time.time):
+        """
+        latency: seconds to wait before responding to each request
+        failure_rate: probability of responding with a 500 error
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.relays = {}
+
+    def relay(self, name=DEFAULT_RELAY):
+        with self.lock:
+            return self.relays.setdefault(name, Relay())
+
+    def handle(self, path, query, headers):
+        match = RELAY_PATH.match(path)
+        if match is None:
+            return 404, {"detail": "Not found."}
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self.lock:
+            relay = self.relays.setdefault(match["name"] or DEFAULT_RELAY, Relay())
+            relay.requests += 1
+            if self.failure_rate and self.random.random() < self.failure_rate:
+                return 500, {"detail": "Injected failure."}
+
+            now = self.clock()
+            relay.update(now)
+            turn = query.get("turn")
+            if turn is not None:
+                if turn not in ("on", "off", "toggle"):
+                    return 400, {"detail": f"Invalid turn {turn}."}
+                try:
+                    timer = float(query.get("timer", 0))
+                except ValueError:
+                    return 400, {"detail": "Invalid timer."}
+                on = not relay.ison if turn == "toggle" else turn == "on"
+                relay.turn(on, timer, now)
+            return 200, relay.status(now)
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8001, show_default=True)
+@click.option(
+    "--latency", default=0.0, show_default=True, help="Seconds to delay responses"
+)
+@click.option(
+    "--failure-rate",
+    type=click.FloatRange(0, 1),
+    default=0.0,
+    show_default=True,
+    help="Probability of responding with an error",
+)
+def main(host, port, latency, failure_rate):
+    server = EmulatorServer(ShellyEmulator(latency, failure_rate), host, port)
+    click.echo(f"Shelly emulator at {server.url}/<relay name>")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime, timezone
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as a single line JSON object. Any ``fields`` passed
+    in ``extra`` are merged into the object."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """Unlike the standard QueueHandler, keeps the traceback out of the message so
+    the listener's formatter can output it separately."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # the traceback itself holds frames, so only its text crosses the queue
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level="INFO", json_output=False, stream=None):
+    """Route all logging through a queue so writing records to the stream happens
+    on a background thread, off the control loop. Returns the started listener,
+    which should be stopped on exit to flush outstanding records."""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(
+        JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT)
+    )
+
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, handler, respect_handler_level=True
+    )
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener.start()
+    return listener
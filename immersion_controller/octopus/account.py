@@ -1,5 +1,7 @@
 import dataclasses
-from datetime import datetime, timezone
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
 
 import requests
 
@@ -8,10 +10,21 @@ from immersion_controller.octopus.schemas import (
     UnitRateResponseSchema,
 )
 
+logger = logging.getLogger(__name__)
+
 API_URL = "https://api.octopus.energy/v1"
+HALF_HOUR = timedelta(minutes=30)
+
+
+class Schemas(threading.local):
+    # marshmallow makes no promise that a schema instance can be used from several
+    # threads at once, so each thread gets its own.
+    def __init__(self):
+        self.account_detail = AccountDetailSchema()
+        self.unit_rate_response = UnitRateResponseSchema()
 
-account_detail_schema = AccountDetailSchema()
-unit_rate_response_schema = UnitRateResponseSchema()
+
+schemas = Schemas()
 
 
 def tariff_to_product_code(tariff_code):
@@ -22,7 +35,15 @@ class AgreementException(Exception):
     pass
 
 
-@dataclasses.dataclass
+def unit_rates_from_response(decoded_response):
+    return [
+        UnitRate.from_api(unit_rate)
+        for unit_rate in decoded_response["results"]
+        if unit_rate.get("payment_method") != "NON_DIRECT_DEBIT"
+    ]
+
+
+@dataclasses.dataclass(frozen=True)
 class Agreement:
     valid_from: ...
     valid_to: ...
@@ -31,73 +52,107 @@ class Agreement:
     is_current: ... = dataclasses.field(init=False)
     energy_type: ... = dataclasses.field(init=False)
     unit_rates_url: ... = dataclasses.field(init=False)
+    api_url: ... = API_URL
 
     def __post_init__(self):
-        self.product_code = tariff_to_product_code(self.tariff_code)
-        self.is_current = self.valid_from < datetime.now(tz=timezone.utc) and (
+        # Agreements are frozen so they can be shared between threads; the derived
+        # fields are set once here and never change afterwards.
+        product_code = tariff_to_product_code(self.tariff_code)
+        is_current = self.valid_from < datetime.now(tz=timezone.utc) and (
             self.valid_to is None or self.valid_to > datetime.now(tz=timezone.utc)
         )
 
         if self.tariff_code.startswith("E"):
-            self.energy_type = "electricity"
+            energy_type = "electricity"
         elif self.tariff_code.startswith("G"):
-            self.energy_type = "gas"
+            energy_type = "gas"
         else:
             raise ValueError(
                 f"Unable to infer energy type from tariff code {self.tariff_code}"
             )
 
-        self.unit_rates_url = (
-            f"{API_URL}/products/{self.product_code}/"
-            f"{self.energy_type}-tariffs/{self.tariff_code}/standard-unit-rates/"
+        unit_rates_url = (
+            f"{self.api_url}/products/{product_code}/"
+            f"{energy_type}-tariffs/{self.tariff_code}/standard-unit-rates/"
         )
 
+        object.__setattr__(self, "product_code", product_code)
+        object.__setattr__(self, "is_current", is_current)
+        object.__setattr__(self, "energy_type", energy_type)
+        object.__setattr__(self, "unit_rates_url", unit_rates_url)
+
     def get_rate(self, when):
+        # Without period_to the API returns every later rate, newest first, and the
+        # first page may not reach back as far as the rate covering when.
         response = requests.get(
-            self.unit_rates_url, params={"period_from": when.isoformat()}
+            self.unit_rates_url,
+            params={
+                "period_from": when.isoformat(),
+                "period_to": (when + HALF_HOUR).isoformat(),
+            },
         )
         response.raise_for_status()
-        decoded_response = unit_rate_response_schema.loads(response.content)
-
-        unit_rates = [
-            UnitRate.from_api(unit_rate)
-            for unit_rate in decoded_response["results"]
-            if unit_rate.get("payment_method") != "NON_DIRECT_DEBIT"
-        ]
+        decoded_response = schemas.unit_rate_response.loads(response.content)
+        unit_rates = unit_rates_from_response(decoded_response)
 
         try:
             return unit_rates[-1]
         except IndexError as exception:
             raise AgreementException(f"rate for {when} unavailable") from exception
 
+    def get_rates(self, period_from, period_to=None):
+        params = {"period_from": period_from.isoformat()}
+        if period_to is not None:
+            params["period_to"] = period_to.isoformat()
+
+        unit_rates = []
+        url = self.unit_rates_url
+        while url is not None:
+            response = requests.get(url, params=params)
+            response.raise_for_status()
+            decoded_response = schemas.unit_rate_response.loads(response.content)
+            page = unit_rates_from_response(decoded_response)
+            logger.debug("fetched %d %s unit rates", len(page), self.tariff_code)
+            unit_rates.extend(page)
+            url = decoded_response.get("next")
+            params = None  # the next url already carries the query string
+
+        return sorted(unit_rates, key=lambda unit_rate: unit_rate.valid_from)
+
     @classmethod
     def get_gas_agreement(
-        cls, api_key, account_number, account_endpoint=API_URL + "/accounts"
+        cls, api_key, account_number, account_endpoint=None, api_url=API_URL
     ):
+        if account_endpoint is None:
+            account_endpoint = api_url + "/accounts"
         response = requests.get(
             f"{account_endpoint}/{account_number}/", auth=(api_key, "")
         )
-        account_detail = account_detail_schema.loads(response.content)
+        account_detail = schemas.account_detail.loads(response.content)
         return cls(
-            **account_detail["properties"][0]["gas_meter_points"][0]["agreements"][-1]
+            api_url=api_url,
+            **account_detail["properties"][0]["gas_meter_points"][0]["agreements"][-1],
         )
 
     @classmethod
     def get_electricity_agreement(
-        cls, api_key, account_number, account_endpoint=API_URL + "/accounts"
+        cls, api_key, account_number, account_endpoint=None, api_url=API_URL
     ):
+        if account_endpoint is None:
+            account_endpoint = api_url + "/accounts"
         response = requests.get(
             f"{account_endpoint}/{account_number}/", auth=(api_key, "")
         )
-        account_detail = account_detail_schema.loads(response.content)
+        account_detail = schemas.account_detail.loads(response.content)
         return cls(
+            api_url=api_url,
             **account_detail["properties"][0]["electricity_meter_points"][0][
                 "agreements"
-            ][-1]
+            ][-1],
         )
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class UnitRate:
     value: ...
     valid_from: ...
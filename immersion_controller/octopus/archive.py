@@ -0,0 +1,184 @@
+"""Columnar on-disk archive of unit rates.
+
+Each tariff is stored in its own directory as three fixed-width columns in native
+byte order: ``valid_from`` and ``valid_to`` as int64 epoch seconds and ``value`` as
+float64. Loading memory-maps the columns, so slicing a year of half-hourly rates by
+time range is a binary search over the mapped memory rather than a decode of every
+row.
+"""
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+
+from immersion_controller.octopus.account import UnitRate
+
+VALID_FROM = "valid_from.i64"
+VALID_TO = "valid_to.i64"
+VALUE = "value.f64"
+
+OPEN_ENDED = 2**63 - 1  # stored in place of a missing valid_to
+
+
+class RateArchiveException(Exception):
+    pass
+
+
+def to_epoch(dt):
+    if dt is None:
+        return OPEN_ENDED
+    if dt.tzinfo is None:
+        raise RateArchiveException(f"{dt} is not timezone aware")
+    return int(dt.timestamp())
+
+
+def from_epoch(seconds):
+    if seconds == OPEN_ENDED:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc)
+
+
+def map_column(path, typecode):
+    if not os.path.exists(path):
+        # an interrupted first append may not have created every column yet
+        return memoryview(array(typecode))
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        size -= size % 8  # ignore a partially written trailing value
+        if size == 0:
+            return memoryview(array(typecode))
+        mapped = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(typecode)
+
+
+def truncate_to_complete_rows(directory):
+    paths = [os.path.join(directory, name) for name in (VALID_FROM, VALID_TO, VALUE)]
+    sizes = [os.path.getsize(path) if os.path.exists(path) else 0 for path in paths]
+    complete = min(sizes) - min(sizes) % 8
+    for path, size in zip(paths, sizes):
+        if size > complete:
+            os.truncate(path, complete)
+
+
+class RateColumns:
+    def __init__(self, valid_from, valid_to, value):
+        self.valid_from = valid_from
+        self.valid_to = valid_to
+        self.value = value
+
+    def __len__(self):
+        return len(self.valid_from)
+
+    def __getitem__(self, index):
+        return UnitRate(
+            value=self.value[index],
+            valid_from=from_epoch(self.valid_from[index]),
+            valid_to=from_epoch(self.valid_to[index]),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def between(self, period_from=None, period_to=None):
+        """Rates overlapping [period_from, period_to), without copying."""
+        start = 0
+        if period_from is not None:
+            start = bisect_right(self.valid_to, to_epoch(period_from))
+        stop = len(self)
+        if period_to is not None:
+            stop = max(start, bisect_left(self.valid_from, to_epoch(period_to)))
+        return RateColumns(
+            self.valid_from[start:stop],
+            self.valid_to[start:stop],
+            self.value[start:stop],
+        )
+
+
+class RateArchive:
+    def __init__(self, directory):
+        self.directory = directory
+        self.appending = threading.Lock()
+
+    def tariff_directory(self, tariff_code):
+        return os.path.join(self.directory, tariff_code)
+
+    def load(self, tariff_code):
+        directory = self.tariff_directory(tariff_code)
+        if not os.path.isdir(directory):
+            raise RateArchiveException(f"no archived rates for {tariff_code}")
+
+        valid_from = map_column(os.path.join(directory, VALID_FROM), "q")
+        valid_to = map_column(os.path.join(directory, VALID_TO), "q")
+        value = map_column(os.path.join(directory, VALUE), "d")
+
+        # An interrupted append can leave the columns with different lengths, so
+        # only expose the rows that were written to all three.
+        length = min(len(valid_from), len(valid_to), len(value))
+        return RateColumns(valid_from[:length], valid_to[:length], value[:length])
+
+    def latest_row(self, tariff_code):
+        try:
+            columns = self.load(tariff_code)
+        except RateArchiveException:
+            return None, None, None
+        if len(columns) == 0:
+            return None, None, None
+        index = len(columns) - 1
+        return index, columns.valid_from[index], columns.valid_to[index]
+
+    def append(self, tariff_code, unit_rates):
+        """Append rates newer than the latest archived rate. Returns the number
+        of rates written."""
+        with self.appending:
+            return self.append_new(tariff_code, unit_rates)
+
+    def append_new(self, tariff_code, unit_rates):
+        latest_index, latest, latest_valid_to = self.latest_row(tariff_code)
+        rows = sorted(
+            (to_epoch(rate.valid_from), to_epoch(rate.valid_to), rate.value)
+            for rate in unit_rates
+        )
+
+        # An open-ended rate, such as the current gas rate, is closed once a newer
+        # rate replaces it: either by the same rate arriving with its valid_to, or
+        # at the start of the next rate. This keeps valid_to sorted for between.
+        closed_at = None
+        new_rows = []
+        for valid_from, valid_to, value in rows:
+            if latest is not None and valid_from <= latest:
+                if valid_from == latest and latest_valid_to == OPEN_ENDED:
+                    if valid_to != OPEN_ENDED:
+                        closed_at = valid_to
+                continue
+            if new_rows and new_rows[-1][1] == OPEN_ENDED:
+                new_rows[-1] = (new_rows[-1][0], valid_from, new_rows[-1][2])
+            new_rows.append((valid_from, valid_to, value))
+            latest = valid_from
+        if latest_valid_to == OPEN_ENDED and closed_at is None and new_rows:
+            closed_at = new_rows[0][0]
+        rows = new_rows
+        if not rows and closed_at is None:
+            return 0
+
+        directory = self.tariff_directory(tariff_code)
+        os.makedirs(directory, exist_ok=True)
+        truncate_to_complete_rows(directory)
+        if closed_at is not None:
+            with open(os.path.join(directory, VALID_TO), "r+b") as f:
+                f.seek(latest_index * 8)
+                array("q", [closed_at]).tofile(f)
+
+        columns = [
+            (VALID_FROM, array("q", [row[0] for row in rows])),
+            (VALID_TO, array("q", [row[1] for row in rows])),
+            (VALUE, array("d", [row[2] for row in rows])),
+        ]
+        for filename, column in columns:
+            with open(os.path.join(directory, filename), "ab") as f:
+                column.tofile(f)
+
+        return len(rows)
@@ -18,6 +18,16 @@ class SwitchException(Exception):
     pass
 
 
+class DryRunSwitch(Switch):
+    """Logs instead of switching, for profiling and testing against live rates."""
+
+    def turn_on(self, until=None):
+        logger.info("dry run: switch on until %s", until)
+
+    def turn_off(self):
+        logger.info("dry run: switch off")
+
+
 class ShellyProEM(Switch):
     def __init__(self, url):
         self.url = url
@@ -43,4 +53,4 @@ class ShellyProEM(Switch):
         if has_timer := decoded_body.get("has_timer") is not True:
             raise SwitchException(f"Expected has_timer to be True, got {has_timer}")
 
-        logger.info(f"switch on until {until}")
+        logger.info("switch on until %s", until)
@@ -1,3 +1,5 @@
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import pytest
@@ -94,7 +96,14 @@ def test_get_gas_unit_rate():
             f"{agreement.energy_type}-tariffs/{agreement.tariff_code}/"
             "standard-unit-rates/"
         ),
-        match=[query_param_matcher({"period_from": when.isoformat()})],
+        match=[
+            query_param_matcher(
+                {
+                    "period_from": when.isoformat(),
+                    "period_to": (when + timedelta(minutes=30)).isoformat(),
+                }
+            )
+        ],
         json={
             "results": sorted(
                 [
@@ -170,7 +179,14 @@ def test_get_electricity_unit_rate():
             f"{agreement.product_code}/{agreement.energy_type}-tariffs/"
             f"{agreement.tariff_code}/standard-unit-rates/"
         ),
-        match=[query_param_matcher({"period_from": when.isoformat()})],
+        match=[
+            query_param_matcher(
+                {
+                    "period_from": when.isoformat(),
+                    "period_to": (when + timedelta(minutes=30)).isoformat(),
+                }
+            )
+        ],
         json={
             "results": sorted(
                 [
@@ -248,3 +264,101 @@ def test_agreement_product_code():
     ]
     for agreement, expected_product_code in cases:
         assert agreement.product_code == expected_product_code
+
+
+@responses.activate
+def test_get_rates_follows_pagination():
+    agreement = Agreement(
+        datetime(2023, 1, 1, tzinfo=timezone.utc), None, "E-1R-AGILE-23-12-06-M"
+    )
+    period_from = datetime(2023, 6, 1, 12, 0, tzinfo=timezone.utc)
+    period_to = period_from + timedelta(hours=2)
+    next_url = agreement.unit_rates_url + "?page=2"
+
+    def unit_rate(i):
+        return {
+            "value_inc_vat": float(i),
+            "valid_from": (period_from + i * timedelta(minutes=30)).isoformat(),
+            "valid_to": (period_from + (i + 1) * timedelta(minutes=30)).isoformat(),
+            "payment_method": None,
+        }
+
+    responses.get(
+        agreement.unit_rates_url,
+        match=[
+            query_param_matcher(
+                {
+                    "period_from": period_from.isoformat(),
+                    "period_to": period_to.isoformat(),
+                }
+            )
+        ],
+        json={"next": next_url, "results": [unit_rate(3), unit_rate(2)]},
+    )
+    responses.get(
+        next_url,
+        match=[query_param_matcher({"page": "2"})],
+        json={"next": None, "results": [unit_rate(1), unit_rate(0)]},
+    )
+
+    rates = agreement.get_rates(period_from, period_to)
+    assert [rate.value for rate in rates] == [0.0, 1.0, 2.0, 3.0]
+    assert rates[0].valid_from == period_from
+    assert rates[-1].valid_to == period_to
+
+
+def test_agreement_is_immutable():
+    agreement = Agreement(
+        datetime(2023, 1, 1, tzinfo=timezone.utc), None, "E-1R-AGILE-23-12-06-M"
+    )
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        agreement.tariff_code = "G-1R-VAR-22-11-01-M"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        agreement.unit_rates_url = "http://elsewhere"
+
+
+@responses.activate
+def test_shared_agreement_get_rate_from_many_threads():
+    agreement = Agreement(
+        datetime(2023, 1, 1, tzinfo=timezone.utc), None, "E-1R-AGILE-23-12-06-M"
+    )
+    start = datetime(2023, 6, 1, 12, 0, tzinfo=timezone.utc)
+    whens = [start + i * timedelta(minutes=30) for i in range(8)]
+    for i, when in enumerate(whens):
+        responses.get(
+            agreement.unit_rates_url,
+            match=[
+                query_param_matcher(
+                    {
+                        "period_from": when.isoformat(),
+                        "period_to": (when + timedelta(minutes=30)).isoformat(),
+                    }
+                )
+            ],
+            json={
+                "results": [
+                    {
+                        "value_inc_vat": float(i),
+                        "valid_from": when.isoformat(),
+                        "valid_to": (when + timedelta(minutes=30)).isoformat(),
+                        "payment_method": None,
+                    }
+                ]
+            },
+        )
+
+    def hammer(thread_index):
+        return [
+            (i, agreement.get_rate(whens[i]))
+            for i in ((thread_index + n) % len(whens) for n in range(25))
+        ]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(hammer, range(16)))
+
+    for thread_results in results:
+        for i, rate in thread_results:
+            assert rate.value == float(i)
+            assert rate.valid_from == whens[i]
+    assert agreement.product_code == "AGILE-23-12-06"
+    assert agreement.energy_type == "electricity"
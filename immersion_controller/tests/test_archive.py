@@ -0,0 +1,172 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from immersion_controller.octopus.account import UnitRate
+from immersion_controller.octopus.archive import (
+    VALID_TO,
+    VALUE,
+    RateArchive,
+    RateArchiveException,
+)
+
+TARIFF_CODE = "E-1R-AGILE-23-12-06-M"
+
+
+def half_hourly_rates(start, count, value=1.0):
+    return [
+        UnitRate(
+            value=value + i,
+            valid_from=start + i * timedelta(minutes=30),
+            valid_to=start + (i + 1) * timedelta(minutes=30),
+        )
+        for i in range(count)
+    ]
+
+
+def test_append_and_load_round_trip(tmp_path):
+    archive = RateArchive(tmp_path)
+    rates = half_hourly_rates(datetime(2024, 1, 1, tzinfo=timezone.utc), 4)
+
+    assert archive.append(TARIFF_CODE, reversed(rates)) == len(rates)
+
+    assert list(archive.load(TARIFF_CODE)) == rates
+
+
+def test_append_skips_already_archived_rates(tmp_path):
+    archive = RateArchive(tmp_path)
+    rates = half_hourly_rates(datetime(2024, 1, 1, tzinfo=timezone.utc), 6)
+
+    assert archive.append(TARIFF_CODE, rates[:4]) == 4
+    assert archive.append(TARIFF_CODE, rates[2:]) == 2
+    assert archive.append(TARIFF_CODE, rates) == 0
+
+    assert list(archive.load(TARIFF_CODE)) == rates
+
+
+def test_open_ended_rate(tmp_path):
+    archive = RateArchive(tmp_path)
+    rate = UnitRate(
+        value=5.0, valid_from=datetime(2024, 1, 1, tzinfo=timezone.utc), valid_to=None
+    )
+    archive.append("G-1R-VAR-22-11-01-M", [rate])
+
+    columns = archive.load("G-1R-VAR-22-11-01-M")
+    assert list(columns) == [rate]
+    assert list(columns.between(datetime(2030, 1, 1, tzinfo=timezone.utc))) == [rate]
+
+
+def test_superseded_open_ended_rate_is_closed(tmp_path):
+    archive = RateArchive(tmp_path)
+    tariff_code = "G-1R-VAR-22-11-01-M"
+    january = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    april = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    july = datetime(2024, 7, 1, tzinfo=timezone.utc)
+    may = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+    archive.append(tariff_code, [UnitRate(5.0, january, None)])
+    # the API now reports the January rate as ended, with a newer open-ended rate
+    assert (
+        archive.append(
+            tariff_code, [UnitRate(5.0, january, april), UnitRate(7.0, april, None)]
+        )
+        == 1
+    )
+    # a newer rate without the superseded one closes it at its own start
+    assert archive.append(tariff_code, [UnitRate(6.0, july, None)]) == 1
+
+    columns = archive.load(tariff_code)
+    assert list(columns) == [
+        UnitRate(5.0, january, april),
+        UnitRate(7.0, april, july),
+        UnitRate(6.0, july, None),
+    ]
+    assert list(columns.between(may, may + timedelta(days=1))) == [
+        UnitRate(7.0, april, july)
+    ]
+    assert list(columns.between(july + timedelta(days=1))) == [
+        UnitRate(6.0, july, None)
+    ]
+
+
+def test_open_ended_rates_in_one_append_are_closed(tmp_path):
+    archive = RateArchive(tmp_path)
+    january = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    april = datetime(2024, 4, 1, tzinfo=timezone.utc)
+
+    archive.append(
+        TARIFF_CODE, [UnitRate(7.0, april, None), UnitRate(5.0, january, None)]
+    )
+
+    assert list(archive.load(TARIFF_CODE)) == [
+        UnitRate(5.0, january, april),
+        UnitRate(7.0, april, None),
+    ]
+
+
+def test_between(tmp_path):
+    archive = RateArchive(tmp_path)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rates = half_hourly_rates(start, 48)
+    archive.append(TARIFF_CODE, rates)
+    columns = archive.load(TARIFF_CODE)
+
+    assert list(columns.between()) == rates
+    assert list(columns.between(rates[10].valid_from, rates[20].valid_from)) == (
+        rates[10:20]
+    )
+    # a period starting part way through a rate includes that rate
+    assert (
+        list(
+            columns.between(
+                rates[10].valid_from + timedelta(minutes=1), rates[12].valid_from
+            )
+        )
+        == rates[10:12]
+    )
+    assert list(columns.between(period_from=rates[-1].valid_to)) == []
+    assert list(columns.between(period_to=start)) == []
+
+
+def test_load_ignores_incomplete_rows(tmp_path):
+    archive = RateArchive(tmp_path)
+    rates = half_hourly_rates(datetime(2024, 1, 1, tzinfo=timezone.utc), 3)
+    archive.append(TARIFF_CODE, rates)
+
+    # simulate an append interrupted part way through writing the value column
+    value_path = os.path.join(archive.tariff_directory(TARIFF_CODE), VALUE)
+    os.truncate(value_path, os.path.getsize(value_path) - 4)
+
+    assert list(archive.load(TARIFF_CODE)) == rates[:2]
+
+    more_rates = half_hourly_rates(rates[-1].valid_from, 2, value=10.0)
+    assert archive.append(TARIFF_CODE, more_rates) == 2
+    assert list(archive.load(TARIFF_CODE)) == rates[:2] + more_rates
+
+
+def test_load_ignores_missing_columns(tmp_path):
+    archive = RateArchive(tmp_path)
+    rates = half_hourly_rates(datetime(2024, 1, 1, tzinfo=timezone.utc), 3)
+    archive.append(TARIFF_CODE, rates)
+
+    # simulate a first append interrupted before every column file was created
+    directory = archive.tariff_directory(TARIFF_CODE)
+    os.remove(os.path.join(directory, VALID_TO))
+    os.remove(os.path.join(directory, VALUE))
+
+    assert list(archive.load(TARIFF_CODE)) == []
+
+    assert archive.append(TARIFF_CODE, rates) == len(rates)
+    assert list(archive.load(TARIFF_CODE)) == rates
+
+
+def test_load_missing_tariff_raises_exception(tmp_path):
+    with pytest.raises(RateArchiveException):
+        RateArchive(tmp_path).load(TARIFF_CODE)
+
+
+def test_naive_datetime_raises_exception(tmp_path):
+    rate = UnitRate(value=1.0, valid_from=datetime(2024, 1, 1), valid_to=None)
+    with pytest.raises(RateArchiveException):
+        RateArchive(tmp_path).append(TARIFF_CODE, [rate])
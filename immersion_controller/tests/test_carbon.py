@@ -0,0 +1,120 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+import responses
+
+from immersion_controller.carbon.intensity import (
+    CarbonIntensity,
+    CarbonIntensityAPI,
+    CarbonIntensityException,
+    CarbonIntensityFile,
+)
+from immersion_controller.cost import CostModel, plan_rates
+from immersion_controller.emulators.carbon import (
+    CarbonIntensityEmulator,
+    half_hourly_intensities,
+)
+from immersion_controller.emulators.server import EmulatorServer
+from immersion_controller.octopus.account import UnitRate
+
+START = datetime(2024, 4, 1, tzinfo=timezone.utc)
+HALF_HOUR = timedelta(minutes=30)
+
+
+def half_hourly(cls, values, start=START, length=HALF_HOUR):
+    return [
+        cls(
+            value=value,
+            valid_from=start + i * length,
+            valid_to=start + (i + 1) * length,
+        )
+        for i, value in enumerate(values)
+    ]
+
+
+def test_plan_rates_mixes_price_and_carbon():
+    electricity_rates = half_hourly(UnitRate, [10.0, 10.0, 10.0, 30.0])
+    gas_rates = [UnitRate(value=10.0, valid_from=START, valid_to=None)]
+    intensities = half_hourly(CarbonIntensity, [50, 300])
+
+    electricity_cost = CostModel(carbon_intensity=200, carbon_price=20.0)
+    gas_cost = CostModel(carbon_intensity=183, carbon_price=20.0)
+
+    # costs are 11, 16, 14 (no forecast) and 34 against gas at 13.66
+    assert plan_rates(
+        electricity_rates, gas_rates, electricity_cost, gas_cost, intensities
+    ) == [True, False, False, False]
+    # without a carbon price, only the prices matter
+    assert plan_rates(
+        electricity_rates, gas_rates, CostModel(), CostModel(), intensities
+    ) == [True, True, True, False]
+
+
+def test_carbon_intensity_file(tmp_path):
+    path = tmp_path / "intensity.json"
+    data = half_hourly_intensities(START, 4, lambda i: 100 * (i + 1))
+    data[0]["intensity"]["actual"] = 90
+    data[3]["intensity"]["forecast"] = None
+    path.write_text(json.dumps({"data": data}))
+    source = CarbonIntensityFile(path)
+
+    intensities = source.get_intensities(START + HALF_HOUR / 2, START + 2 * HALF_HOUR)
+    assert [intensity.value for intensity in intensities] == [90, 200]
+    assert intensities[0].valid_from == START
+    assert source.get_intensities(START + 3 * HALF_HOUR, START + 4 * HALF_HOUR) == []
+
+
+def test_carbon_intensity_api_with_emulator():
+    emulator = CarbonIntensityEmulator(
+        half_hourly_intensities(START, 48, lambda i: 10 * i)
+    )
+    with EmulatorServer(emulator) as server:
+        source = CarbonIntensityAPI(server.url)
+        intensities = source.get_intensities(START + HALF_HOUR, START + 3 * HALF_HOUR)
+
+    assert [intensity.value for intensity in intensities] == [10, 20]
+    assert intensities[0].valid_from == START + HALF_HOUR
+    assert intensities[-1].valid_to == START + 3 * HALF_HOUR
+
+
+@responses.activate
+def test_carbon_intensity_api_raises_exception_on_error():
+    responses.get(
+        "https://carbon/intensity/2024-04-01T00:00Z/2024-04-01T00:30Z", status=500
+    )
+    with pytest.raises(CarbonIntensityException):
+        CarbonIntensityAPI("https://carbon").get_intensities(START, START + HALF_HOUR)
+
+
+@responses.activate
+@pytest.mark.parametrize(
+    "body",
+    [
+        "<html>Sign in to the wifi</html>",
+        '{"data": [{"from": "yesterday"}]}',
+        '{"error": {"code": "500 Internal Server Error"}}',
+        '{"data": [{"from": "2024-04-01T00:00Z", "to": "2024-04-01T00:30Z"}]}',
+        '{"data": [{"from": "2024-04-01T00:00Z", "intensity": {"forecast": 100}}]}',
+    ],
+)
+def test_carbon_intensity_api_raises_exception_on_malformed_response(body):
+    responses.get(
+        "https://carbon/intensity/2024-04-01T00:00Z/2024-04-01T00:30Z",
+        body=body,
+        status=200,
+    )
+    with pytest.raises(CarbonIntensityException):
+        CarbonIntensityAPI("https://carbon").get_intensities(START, START + HALF_HOUR)
+
+
+@responses.activate
+def test_carbon_intensity_api_times_out():
+    url = "https://carbon/intensity/2024-04-01T00:00Z/2024-04-01T00:30Z"
+    responses.get(url, body=requests.ConnectTimeout())
+    with pytest.raises(CarbonIntensityException):
+        CarbonIntensityAPI("https://carbon", timeout=2).get_intensities(
+            START, START + HALF_HOUR
+        )
+    assert responses.calls[0].request.req_kwargs["timeout"] == 2
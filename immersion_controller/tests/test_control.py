@@ -1,12 +1,27 @@
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, call
 
 import pytest
 
-from immersion_controller.control import Controller, sleep_until
+from immersion_controller.carbon.intensity import (
+    CarbonIntensity,
+    CarbonIntensityException,
+    CarbonIntensitySource,
+)
+from immersion_controller.control import (
+    Controller,
+    ControllerException,
+    SimulatedClock,
+    sleep_until,
+)
+from immersion_controller.cost import CostModel
 from immersion_controller.octopus.account import Agreement, AgreementException, UnitRate
 from immersion_controller.switches import Switch, SwitchException
+from immersion_controller.tracing import Tracer
 
 
 def test_controller_for_specified_loops():
@@ -187,3 +202,230 @@ def test_sleep_until(monkeypatch):
     mock_sleep.assert_called_once()
     (called_seconds,), _ = mock_sleep.call_args
     assert round(called_seconds) == pause_for.seconds
+
+
+def test_controller_cannot_run_concurrently():
+    rate = UnitRate(
+        value=1,
+        valid_from=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        valid_to=datetime(2034, 1, 1, tzinfo=timezone.utc),
+    )
+    agreement = Mock(spec_set=Agreement, **{"get_rate.return_value": rate})
+    sleeping = threading.Event()
+    wake = threading.Event()
+
+    def blocking_sleep_until(dt):
+        sleeping.set()
+        wake.wait()
+
+    controller = Controller(
+        agreement, agreement, Mock(spec_set=Switch), blocking_sleep_until
+    )
+    thread = threading.Thread(target=controller.run, args=(1,))
+    thread.start()
+    assert sleeping.wait(timeout=5)
+
+    with pytest.raises(ControllerException):
+        controller.run(1)
+
+    wake.set()
+    thread.join(timeout=5)
+    controller.run(1)  # can run again once the first run has finished
+
+
+def test_controllers_share_agreements_across_threads():
+    gas_rate = UnitRate(
+        value=1,
+        valid_from=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        valid_to=datetime(2034, 1, 1, tzinfo=timezone.utc),
+    )
+    electricity_rate = UnitRate(
+        value=gas_rate.value - 1,
+        valid_from=datetime(2024, 4, 1, 0, 0, 0, tzinfo=timezone.utc),
+        valid_to=datetime(2024, 4, 1, 0, 30, 0, tzinfo=timezone.utc),
+    )
+    gas_agreement = Mock(spec_set=Agreement, **{"get_rate.return_value": gas_rate})
+    electricity_agreement = Mock(
+        spec_set=Agreement, **{"get_rate.return_value": electricity_rate}
+    )
+    switches = [Mock(spec_set=Switch) for _ in range(32)]
+    periods = 10
+
+    def run(switch):
+        controller = Controller(electricity_agreement, gas_agreement, switch, Mock())
+        controller.run(periods)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(run, switches))
+
+    for switch in switches:
+        assert switch.turn_on.call_count == periods
+    assert electricity_agreement.get_rate.call_count == len(switches) * periods
+
+
+def test_controller_traces_each_stage():
+    gas_rate = UnitRate(
+        value=1,
+        valid_from=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        valid_to=datetime(2034, 1, 1, tzinfo=timezone.utc),
+    )
+    electricity_rates = [
+        UnitRate(
+            value=gas_rate.value + 1,
+            valid_from=datetime(2024, 4, 1, 0, 0, 0, tzinfo=timezone.utc),
+            valid_to=datetime(2024, 4, 1, 0, 30, 0, tzinfo=timezone.utc),
+        ),
+        UnitRate(
+            value=gas_rate.value - 1,
+            valid_from=datetime(2024, 4, 1, 0, 30, 0, tzinfo=timezone.utc),
+            valid_to=datetime(2024, 4, 1, 1, 0, 0, tzinfo=timezone.utc),
+        ),
+    ]
+    gas_agreement = Mock(spec_set=Agreement, **{"get_rate.return_value": gas_rate})
+    electricity_agreement = Mock(
+        spec_set=Agreement, **{"get_rate.side_effect": electricity_rates}
+    )
+    clock = SimulatedClock(electricity_rates[0].valid_from)
+    tracer = Mock(
+        spec_set=Tracer,
+        **{"span.side_effect": lambda name, **attributes: nullcontext(attributes)},
+    )
+
+    controller = Controller(
+        electricity_agreement,
+        gas_agreement,
+        Mock(spec_set=Switch),
+        sleep_until=clock.sleep_until,
+        now=clock.now,
+        tracer=tracer,
+    )
+    controller.run(len(electricity_rates))
+
+    assert [c.args[0] for c in tracer.span.call_args_list] == [
+        "fetch_electricity",
+        "fetch_gas",
+        "decide",
+        "sleep",
+        "fetch_electricity",
+        "fetch_gas",
+        "decide",
+        "switch",
+        "sleep",
+    ]
+    electricity_agreement.get_rate.assert_has_calls(
+        [call(electricity_rate.valid_from) for electricity_rate in electricity_rates]
+    )
+    assert clock.now() == electricity_rates[-1].valid_to
+
+
+def test_simulated_clock():
+    start = datetime(2024, 4, 1, tzinfo=timezone.utc)
+    clock = SimulatedClock(start)
+    assert clock.now() == start
+
+    clock.sleep_until(start + timedelta(minutes=30))
+    assert clock.now() == start + timedelta(minutes=30)
+
+    clock.sleep_until(start)  # never goes backwards
+    assert clock.now() == start + timedelta(minutes=30)
+
+
+def test_controller_uses_cost_models():
+    gas_rate = UnitRate(
+        value=9,
+        valid_from=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        valid_to=datetime(2034, 1, 1, tzinfo=timezone.utc),
+    )
+    electricity_rate = UnitRate(
+        value=10,
+        valid_from=datetime(2024, 4, 1, 0, 0, 0, tzinfo=timezone.utc),
+        valid_to=datetime(2024, 4, 1, 0, 30, 0, tzinfo=timezone.utc),
+    )
+    gas_agreement = Mock(spec_set=Agreement, **{"get_rate.return_value": gas_rate})
+    electricity_agreement = Mock(
+        spec_set=Agreement, **{"get_rate.return_value": electricity_rate}
+    )
+    switch = Mock(spec_set=Switch)
+
+    # electricity is dearer per kWh bought, but cheaper per kWh of hot water
+    controller = Controller(
+        electricity_agreement,
+        gas_agreement,
+        switch,
+        Mock(),
+        gas_cost=CostModel(efficiency=0.85),
+    )
+    controller.run(1)
+
+    switch.turn_on.assert_called_once_with(electricity_rate.valid_to)
+
+
+def test_controller_weighs_carbon_intensity():
+    gas_rate = UnitRate(
+        value=10,
+        valid_from=datetime(2024, 1, 1, tzinfo=timezone.utc),
+        valid_to=None,
+    )
+    electricity_rates = [
+        UnitRate(
+            value=10,
+            valid_from=datetime(2024, 4, 1, 0, 0, 0, tzinfo=timezone.utc),
+            valid_to=datetime(2024, 4, 1, 0, 30, 0, tzinfo=timezone.utc),
+        ),
+        UnitRate(
+            value=10,
+            valid_from=datetime(2024, 4, 1, 0, 30, 0, tzinfo=timezone.utc),
+            valid_to=datetime(2024, 4, 1, 1, 0, 0, tzinfo=timezone.utc),
+        ),
+        UnitRate(
+            value=10,
+            valid_from=datetime(2024, 4, 1, 1, 0, 0, tzinfo=timezone.utc),
+            valid_to=datetime(2024, 4, 1, 1, 30, 0, tzinfo=timezone.utc),
+        ),
+    ]
+    gas_agreement = Mock(spec_set=Agreement, **{"get_rate.return_value": gas_rate})
+    electricity_agreement = Mock(
+        spec_set=Agreement, **{"get_rate.side_effect": electricity_rates}
+    )
+    carbon_intensity_source = Mock(
+        spec_set=CarbonIntensitySource,
+        **{
+            "get_intensities.side_effect": [
+                [
+                    CarbonIntensity(
+                        value=50,
+                        valid_from=electricity_rates[0].valid_from,
+                        valid_to=electricity_rates[0].valid_to,
+                    )
+                ],
+                [
+                    CarbonIntensity(
+                        value=300,
+                        valid_from=electricity_rates[1].valid_from,
+                        valid_to=electricity_rates[1].valid_to,
+                    )
+                ],
+                CarbonIntensityException,  # falls back to the constant intensity
+            ]
+        },
+    )
+    switch = Mock(spec_set=Switch)
+
+    controller = Controller(
+        electricity_agreement,
+        gas_agreement,
+        switch,
+        Mock(),
+        electricity_cost=CostModel(carbon_intensity=150, carbon_price=20.0),
+        gas_cost=CostModel(carbon_intensity=183, carbon_price=20.0),
+        carbon_intensity_source=carbon_intensity_source,
+    )
+    controller.run(len(electricity_rates))
+
+    switch.turn_on.assert_has_calls(
+        [
+            call.turn_on(electricity_rates[0].valid_to),
+            call.turn_on(electricity_rates[2].valid_to),
+        ]
+    )
+    assert switch.turn_on.call_count == 2
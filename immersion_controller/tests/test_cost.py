@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from immersion_controller.cost import CostModel, plan
+from immersion_controller.octopus.account import UnitRate
+from immersion_controller.octopus.archive import RateArchive
+
+
+def test_default_cost_is_price():
+    assert CostModel().costs([10.0, 21.0]) == [10.0, 21.0]
+
+
+def test_efficiency_raises_cost_per_useful_kwh():
+    assert CostModel(efficiency=0.8).cost(8.0) == pytest.approx(10.0)
+
+
+def test_exclude_vat():
+    assert CostModel(include_vat=False).cost(10.5) == pytest.approx(10.0)
+
+
+def test_carbon_weighting():
+    model = CostModel(carbon_intensity=200.0, carbon_price=10.0, efficiency=0.5)
+    # 10p/kgCO2 * 0.2 kgCO2/kWh bought / 0.5 useful kWh per kWh bought
+    assert model.cost(0.0) == pytest.approx(4.0)
+    assert model.costs([1.0, 1.0], [100.0, 0.0]) == pytest.approx([4.0, 2.0])
+    assert model.cost(1.0, carbon_intensity=0.0) == pytest.approx(2.0)
+
+
+def test_misaligned_carbon_intensities_raise_value_error():
+    with pytest.raises(ValueError):
+        CostModel().costs([1.0, 2.0], [100.0])
+
+
+@pytest.mark.parametrize("efficiency", [0, -0.5, 1.5])
+def test_invalid_efficiency_raises_value_error(efficiency):
+    with pytest.raises(ValueError):
+        CostModel(efficiency=efficiency)
+
+
+def test_plan():
+    assert plan([1.0, 2.0, 3.0], [2.0, 2.0, 2.0]) == [True, True, False]
+    with pytest.raises(ValueError):
+        plan([1.0], [])
+
+
+def test_costs_over_archived_columns(tmp_path):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    archive = RateArchive(tmp_path)
+    archive.append(
+        "E-1R-AGILE-23-12-06-M",
+        [
+            UnitRate(
+                value=float(i),
+                valid_from=start + i * timedelta(minutes=30),
+                valid_to=start + (i + 1) * timedelta(minutes=30),
+            )
+            for i in range(48)
+        ],
+    )
+    columns = archive.load("E-1R-AGILE-23-12-06-M").between(
+        start, start + timedelta(hours=2)
+    )
+
+    electricity_costs = CostModel().costs(columns.value)
+    gas_costs = CostModel(efficiency=0.9).costs([1.8] * len(columns))
+    assert plan(electricity_costs, gas_costs) == [True, True, True, False]
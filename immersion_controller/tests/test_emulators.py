@@ -0,0 +1,257 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from immersion_controller.cli import run_profile
+from immersion_controller.control import Controller
+from immersion_controller.emulators.octopus import (
+    OctopusEmulator,
+    half_hourly_unit_rates,
+)
+from immersion_controller.emulators.server import EmulatorServer
+from immersion_controller.emulators.shelly import ShellyEmulator
+from immersion_controller.octopus.account import Agreement
+from immersion_controller.switches import ShellyProEM, SwitchException
+
+API_KEY = "api_key"
+ACCOUNT_NUMBER = "A-1234"
+ELECTRICITY_TARIFF = "E-1R-AGILE-23-12-06-M"
+GAS_TARIFF = "G-1R-VAR-22-11-01-M"
+
+
+def account_detail():
+    def agreements(tariff_code):
+        return [
+            {
+                "tariff_code": tariff_code,
+                "valid_from": "2024-01-01T00:00:00Z",
+                "valid_to": None,
+            }
+        ]
+
+    return {
+        "number": ACCOUNT_NUMBER,
+        "properties": [
+            {
+                "electricity_meter_points": [
+                    {"agreements": agreements(ELECTRICITY_TARIFF)}
+                ],
+                "gas_meter_points": [{"agreements": agreements(GAS_TARIFF)}],
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def start():
+    now = datetime.now(tz=timezone.utc)
+    return now.replace(minute=30 if now.minute >= 30 else 0, second=0, microsecond=0)
+
+
+@pytest.fixture
+def octopus(start):
+    emulator = OctopusEmulator(
+        accounts={ACCOUNT_NUMBER: account_detail()},
+        unit_rates={
+            # alternates between cheaper and dearer than gas
+            ELECTRICITY_TARIFF: half_hourly_unit_rates(
+                start, 48, lambda i: 5.0 if i % 2 == 0 else 15.0
+            ),
+            GAS_TARIFF: [
+                {
+                    "value_exc_vat": 9.5,
+                    "value_inc_vat": 10.0,
+                    "valid_from": "2024-01-01T00:00:00Z",
+                    "valid_to": None,
+                    "payment_method": None,
+                }
+            ],
+        },
+        consumption={
+            "electricity/1234/5678": [
+                {
+                    "consumption": 0.1 * i,
+                    "interval_start": (start + i * timedelta(minutes=30)).isoformat(),
+                    "interval_end": (
+                        start + (i + 1) * timedelta(minutes=30)
+                    ).isoformat(),
+                }
+                for i in range(5)
+            ]
+        },
+        api_key=API_KEY,
+    )
+    with EmulatorServer(emulator) as server:
+        yield server
+
+
+@pytest.fixture
+def shelly():
+    with EmulatorServer(ShellyEmulator()) as server:
+        yield server
+
+
+def test_octopus_agreements_and_rates(octopus, start):
+    api_url = octopus.url + "/v1"
+    electricity_agreement = Agreement.get_electricity_agreement(
+        API_KEY, ACCOUNT_NUMBER, api_url=api_url
+    )
+    gas_agreement = Agreement.get_gas_agreement(
+        API_KEY, ACCOUNT_NUMBER, api_url=api_url
+    )
+    assert electricity_agreement.tariff_code == ELECTRICITY_TARIFF
+    assert gas_agreement.tariff_code == GAS_TARIFF
+
+    rate = electricity_agreement.get_rate(start + timedelta(minutes=40))
+    assert rate.valid_from == start + timedelta(minutes=30)
+    assert rate.value == 15.0
+    assert gas_agreement.get_rate(start).value == 10.0
+
+
+def test_octopus_paginates_unit_rates(octopus, start):
+    emulator = octopus.emulator
+    url = (
+        octopus.url + "/v1/products/AGILE-23-12-06/electricity-tariffs/"
+        f"{ELECTRICITY_TARIFF}/standard-unit-rates/"
+    )
+    first = requests.get(url, params={"page_size": 20}).json()
+    assert first["count"] == 48
+    assert len(first["results"]) == 20
+    assert first["previous"] is None
+    assert (
+        first["results"][0]["valid_from"]
+        == (start + 47 * timedelta(minutes=30)).isoformat()
+    )
+
+    second = requests.get(first["next"]).json()
+    assert second["previous"] is not None
+    assert second["results"][0] == emulator.unit_rates[ELECTRICITY_TARIFF][20][2]
+
+    agreement = Agreement(
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        None,
+        ELECTRICITY_TARIFF,
+        api_url=octopus.url + "/v1",
+    )
+    rates = agreement.get_rates(start, start + timedelta(hours=24))
+    assert len(rates) == 48
+    assert rates[0].valid_from == start
+
+
+def test_octopus_consumption(octopus):
+    url = octopus.url + "/v1/electricity-meter-points/1234/meters/5678/consumption/"
+    newest_first = requests.get(url).json()["results"]
+    oldest_first = requests.get(url, params={"order_by": "period"}).json()["results"]
+    assert len(newest_first) == 5
+    assert oldest_first == newest_first[::-1]
+
+
+def test_octopus_requires_api_key(octopus):
+    response = requests.get(f"{octopus.url}/v1/accounts/{ACCOUNT_NUMBER}/")
+    assert response.status_code == 401
+    assert requests.get(octopus.url + "/v1/unknown/").status_code == 404
+
+
+def test_octopus_from_fixture(tmp_path, start):
+    path = tmp_path / "fixture.json"
+    path.write_text(
+        json.dumps(
+            {
+                "accounts": {ACCOUNT_NUMBER: account_detail()},
+                "unit_rates": {
+                    ELECTRICITY_TARIFF: half_hourly_unit_rates(start, 2, float)
+                },
+            }
+        )
+    )
+    emulator = OctopusEmulator.from_fixture(path)
+    assert emulator.accounts[ACCOUNT_NUMBER]["number"] == ACCOUNT_NUMBER
+    assert len(emulator.unit_rates[ELECTRICITY_TARIFF]) == 2
+
+
+def test_shelly_turn_on_with_timer(shelly):
+    until = datetime.now(tz=timezone.utc) + timedelta(minutes=10)
+    ShellyProEM(shelly.url).turn_on(until)
+
+    status = requests.get(shelly.url + "/relay/0").json()
+    assert status["ison"]
+    assert status["has_timer"]
+    assert 590 <= status["timer_remaining"] <= 600
+
+
+def test_shelly_timer_flips_relay_back():
+    clock = Mock(return_value=1000.0)
+    emulator = ShellyEmulator(clock=clock)
+    status, body = emulator.handle("/relay/0", {"turn": "on", "timer": "60"}, {})
+    assert status == 200 and body["ison"] and body["has_timer"]
+
+    clock.return_value = 1061.0
+    status, body = emulator.handle("/relay/0", {}, {})
+    assert not body["ison"]
+    assert not body["has_timer"]
+
+
+def test_shelly_failure_injection():
+    with EmulatorServer(ShellyEmulator(failure_rate=1)) as server:
+        with pytest.raises(SwitchException):
+            ShellyProEM(server.url + "/immersion").turn_on(
+                datetime.now(tz=timezone.utc) + timedelta(minutes=1)
+            )
+        assert server.emulator.relay("immersion").requests == 1
+
+
+def test_many_controllers_against_emulators(octopus, shelly, start):
+    api_url = octopus.url + "/v1"
+    electricity_agreement = Agreement.get_electricity_agreement(
+        API_KEY, ACCOUNT_NUMBER, api_url=api_url
+    )
+    gas_agreement = Agreement.get_gas_agreement(
+        API_KEY, ACCOUNT_NUMBER, api_url=api_url
+    )
+    names = [f"relay-{i}" for i in range(50)]
+
+    def run(name):
+        controller = Controller(
+            electricity_agreement,
+            gas_agreement,
+            ShellyProEM(f"{shelly.url}/{name}"),
+            sleep_until=Mock(),
+            now=lambda: start,
+        )
+        controller.run(2)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(run, names))
+
+    for name in names:
+        relay = shelly.emulator.relay(name)
+        assert relay.requests == 2
+        assert relay.ison
+
+
+def test_profile_more_periods_than_a_page_of_rates(start, capsys):
+    periods = 150
+    history_start = start - periods * timedelta(minutes=30)
+    emulator = OctopusEmulator(
+        unit_rates={
+            ELECTRICITY_TARIFF: half_hourly_unit_rates(
+                history_start, periods + 48, lambda i: float(i % 20)
+            ),
+            GAS_TARIFF: half_hourly_unit_rates(
+                history_start, periods + 48, lambda i: 10.0
+            ),
+        }
+    )
+    with EmulatorServer(emulator) as server:
+        api_url = server.url + "/v1"
+        electricity_agreement = Agreement(
+            history_start, None, ELECTRICITY_TARIFF, api_url=api_url
+        )
+        gas_agreement = Agreement(history_start, None, GAS_TARIFF, api_url=api_url)
+        run_profile(electricity_agreement, gas_agreement, periods)
+
+    assert "cumulative" in capsys.readouterr().out
@@ -0,0 +1,110 @@
+import io
+import json
+import logging
+import logging.handlers
+import sys
+
+import pytest
+
+from immersion_controller.log import JsonFormatter, QueueHandler, configure_logging
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield root
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_json_formatter():
+    record = logging.LogRecord(
+        "immersion_controller.control",
+        logging.INFO,
+        __file__,
+        1,
+        "turn on = %s",
+        (True,),
+        None,
+    )
+    record.fields = {"period": 2}
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "immersion_controller.control"
+    assert entry["message"] == "turn on = True"
+    assert entry["period"] == 2
+    assert "time" in entry
+
+
+def test_json_formatter_includes_exception():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("test").makeRecord(
+            "test", logging.ERROR, __file__, 1, "failed", (), sys.exc_info()
+        )
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_configure_logging_writes_through_queue(restore_root_logger):
+    stream = io.StringIO()
+    listener = configure_logging("WARNING", json_output=True, stream=stream)
+    try:
+        (handler,) = restore_root_logger.handlers
+        assert isinstance(handler, QueueHandler)
+
+        logger = logging.getLogger("immersion_controller.test")
+        logger.info("not output")
+        logger.warning("rate = %s", 1.5)
+    finally:
+        listener.stop()  # flushes the queue
+
+    (line,) = stream.getvalue().splitlines()
+    entry = json.loads(line)
+    assert entry["level"] == "WARNING"
+    assert entry["message"] == "rate = 1.5"
+
+
+def test_configure_logging_text_output(restore_root_logger):
+    stream = io.StringIO()
+    listener = configure_logging("INFO", stream=stream)
+    logging.getLogger("immersion_controller.test").info("sleeping until %s", "later")
+    listener.stop()
+
+    assert stream.getvalue().endswith(
+        "[INFO] immersion_controller.test: sleeping until later\n"
+    )
+
+
+def test_configure_logging_keeps_exception_separate(restore_root_logger):
+    stream = io.StringIO()
+    listener = configure_logging("INFO", json_output=True, stream=stream)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("immersion_controller.test").exception("failed %s", 1)
+    listener.stop()
+
+    (line,) = stream.getvalue().splitlines()
+    entry = json.loads(line)
+    assert entry["message"] == "failed 1"
+    assert entry["exception"].startswith("Traceback")
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_configure_logging_text_output_includes_exception(restore_root_logger):
+    stream = io.StringIO()
+    listener = configure_logging("INFO", stream=stream)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logging.getLogger("immersion_controller.test").exception("failed")
+    listener.stop()
+
+    output = stream.getvalue()
+    assert "[ERROR] immersion_controller.test: failed\nTraceback" in output
+    assert output.count("ValueError: boom") == 1
@@ -4,7 +4,7 @@ import pytest
 import responses
 from responses.matchers import query_param_matcher
 
-from immersion_controller.switches import ShellyProEM, SwitchException
+from immersion_controller.switches import DryRunSwitch, ShellyProEM, SwitchException
 
 
 class TestShellyProEM:
@@ -49,3 +49,9 @@ class TestShellyProEM:
                 until=datetime.datetime.now(tz=datetime.timezone.utc)
                 + datetime.timedelta(seconds=1)
             )
+
+
+def test_dry_run_switch_does_not_make_requests():
+    with responses.RequestsMock(assert_all_requests_are_fired=False):
+        DryRunSwitch().turn_on(until=datetime.datetime.now(tz=datetime.timezone.utc))
+        DryRunSwitch().turn_off()
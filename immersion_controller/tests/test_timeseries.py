@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from immersion_controller.carbon.intensity import CarbonIntensity
+from immersion_controller.octopus.account import UnitRate
+from immersion_controller.timeseries import align
+
+START = datetime(2024, 4, 1, tzinfo=timezone.utc)
+HALF_HOUR = timedelta(minutes=30)
+
+
+def half_hourly(cls, values, start=START, length=HALF_HOUR):
+    return [
+        cls(
+            value=value,
+            valid_from=start + i * length,
+            valid_to=start + (i + 1) * length,
+        )
+        for i, value in enumerate(values)
+    ]
+
+
+def test_align_matching_grid():
+    rates = half_hourly(UnitRate, [1.0, 2.0, 3.0])
+    intensities = half_hourly(CarbonIntensity, [100, 200, 300])
+    assert align(rates, intensities) == [100, 200, 300]
+
+
+def test_align_time_weights_finer_and_coarser_series():
+    rates = half_hourly(UnitRate, [1.0, 2.0])
+    quarter_hourly = half_hourly(
+        CarbonIntensity, [100, 200, 300, 400], length=timedelta(minutes=15)
+    )
+    assert align(rates, quarter_hourly) == [150, 350]
+
+    hourly = half_hourly(CarbonIntensity, [100], length=timedelta(hours=1))
+    assert align(rates, hourly) == [100, 100]
+
+
+def test_align_open_ended_series_and_periods():
+    rates = half_hourly(UnitRate, [1.0, 2.0])
+    gas_rates = [
+        UnitRate(value=5.0, valid_from=START - timedelta(days=30), valid_to=START),
+        UnitRate(value=7.0, valid_from=START, valid_to=None),
+    ]
+    assert align(rates, gas_rates) == [7.0, 7.0]
+
+    open_ended = [UnitRate(value=1.0, valid_from=START + HALF_HOUR, valid_to=None)]
+    intensities = half_hourly(CarbonIntensity, [100, 200])
+    assert align(open_ended, intensities) == [200]
+
+
+def test_align_uses_default_for_gaps():
+    rates = half_hourly(UnitRate, [1.0, 2.0, 3.0])
+    intensities = half_hourly(CarbonIntensity, [100], start=START + HALF_HOUR / 2)
+    assert align(rates, intensities, default=0) == [50, 50, 0]
+
+    with pytest.raises(ValueError):
+        align(rates, intensities)
@@ -0,0 +1,60 @@
+import json
+import logging
+from itertools import count
+
+import pytest
+
+from immersion_controller.log import JsonFormatter
+from immersion_controller.tracing import LoggingTracer, Tracer
+
+
+class RecordingTracer(Tracer):
+    def __init__(self):
+        super().__init__(clock=count().__next__)
+        self.spans = []
+
+    def record(self, name, duration, attributes):
+        self.spans.append((name, duration, attributes))
+
+
+def test_span_records_duration_and_attributes():
+    tracer = RecordingTracer()
+    with tracer.span("fetch", period=1) as attributes:
+        attributes["extra"] = True
+
+    assert tracer.spans == [("fetch", 1, {"period": 1, "extra": True})]
+
+
+def test_span_recorded_when_exception_raised():
+    tracer = RecordingTracer()
+    with pytest.raises(ValueError):
+        with tracer.span("switch"):
+            raise ValueError()
+
+    assert [name for name, _, _ in tracer.spans] == ["switch"]
+
+
+def test_logging_tracer_logs_structured_fields(caplog):
+    tracer = LoggingTracer(clock=iter([1.0, 1.25]).__next__)
+    with caplog.at_level(logging.INFO, logger="immersion_controller.tracing"):
+        with tracer.span("decide", period=3):
+            pass
+
+    (record,) = caplog.records
+    assert record.getMessage() == "decide took 250.000 ms"
+    assert record.fields == {"span": "decide", "duration_ms": 250.0, "period": 3}
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "decide took 250.000 ms"
+    assert entry["span"] == "decide"
+    assert entry["duration_ms"] == 250.0
+    assert entry["period"] == 3
+
+
+def test_logging_tracer_skips_disabled_level(caplog):
+    tracer = LoggingTracer(level=logging.DEBUG)
+    with caplog.at_level(logging.INFO, logger="immersion_controller.tracing"):
+        with tracer.span("decide"):
+            pass
+
+    assert caplog.records == []
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+
+def align(periods, series, default=None):
+    """The time weighted mean value of ``series`` over each of ``periods``.
+
+    Both must be sorted by ``valid_from`` and not overlap, and are merged in one
+    pass. Parts of a period that ``series`` does not cover take ``default``, or
+    raise ValueError if there is none. An open-ended period takes the value at
+    its start.
+    """
+    aligned = []
+    first = 0
+    for period in periods:
+        period_from = period.valid_from
+        period_to = period.valid_to
+        if period_to is None:
+            period_to = period_from + timedelta(microseconds=1)
+
+        # items ending before this period can't overlap any later period either
+        while (
+            first < len(series)
+            and series[first].valid_to is not None
+            and series[first].valid_to <= period_from
+        ):
+            first += 1
+
+        weighted = 0.0
+        covered = 0.0
+        index = first
+        while index < len(series) and series[index].valid_from < period_to:
+            item = series[index]
+            item_to = period_to if item.valid_to is None else item.valid_to
+            overlap = (
+                min(item_to, period_to) - max(item.valid_from, period_from)
+            ).total_seconds()
+            if overlap > 0:
+                weighted += item.value * overlap
+                covered += overlap
+            index += 1
+
+        duration = (period_to - period_from).total_seconds()
+        uncovered = duration - covered
+        if uncovered > 0:
+            if default is None:
+                raise ValueError(
+                    f"No value for {uncovered}s of the period from {period_from}"
+                )
+            weighted += default * uncovered
+        aligned.append(weighted / duration)
+
+    return aligned
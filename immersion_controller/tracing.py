@@ -0,0 +1,43 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """Times named stages of the control loop. The base class discards them."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+
+    @contextmanager
+    def span(self, name, **attributes):
+        start = self.clock()
+        try:
+            yield attributes
+        finally:
+            self.record(name, self.clock() - start, attributes)
+
+    def record(self, name, duration, attributes):
+        pass
+
+
+class LoggingTracer(Tracer):
+    """Logs each span, with its timing and attributes as structured fields."""
+
+    def __init__(self, clock=time.perf_counter, level=logging.INFO):
+        super().__init__(clock)
+        self.level = level
+
+    def record(self, name, duration, attributes):
+        if logger.isEnabledFor(self.level):
+            span = {"span": name, "duration_ms": round(duration * 1000, 3)}
+            span.update(attributes)
+            logger.log(
+                self.level,
+                "%s took %.3f ms",
+                name,
+                span["duration_ms"],
+                extra={"fields": span},
+            )